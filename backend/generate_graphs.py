@@ -6,35 +6,293 @@ Reads simulation data from JSON and creates visualizations showing
 LP outcomes with and without StockShield protection.
 """
 
+import argparse
 import json
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')  # file output only; also keeps worker processes free of GUI toolkits
 import matplotlib.dates as mdates
-from datetime import datetime
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.transforms import ScaledTranslation
+from collections import namedtuple
+from multiprocessing import shared_memory
+from zoneinfo import ZoneInfo
 import numpy as np
 import os
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON parsing
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional: streams tradeData with --stream-trades
+    ijson = None
+
 # Set style
-plt.style.use('seaborn-v0_8-darkgrid')
-plt.rcParams['figure.figsize'] = [12, 6]
-plt.rcParams['font.size'] = 11
+matplotlib.style.use('seaborn-v0_8-darkgrid')
+matplotlib.rcParams['figure.figsize'] = [12, 6]
+matplotlib.rcParams['font.size'] = 11
+# Labels are plain text; '$' marks currency, never math
+matplotlib.rcParams['text.usetex'] = False
+matplotlib.rcParams['text.parse_math'] = False
+
+# Output resolution for saved charts
+SAVE_DPI = 100
+
+# Time axes are labelled in US market time
+MARKET_TZ = ZoneInfo('America/New_York')
+
+# Figure reused by every chart drawn in this process
+_shared_figure = None
+
+def prepare_figure(figsize):
+    """Clear and resize this process's shared Figure for a new chart."""
+    global _shared_figure
+    if _shared_figure is None:
+        _shared_figure = Figure()
+        FigureCanvasAgg(_shared_figure)
+    fig = _shared_figure
+    fig.clear()
+    fig.set_size_inches(figsize)
+    fig.set_layout_engine('constrained')
+    return fig
+
+# Column dtype marking a string column to be stored as integer codes
+CATEGORY = 'category'
+
+# Column dtypes for the per-record series in the simulation output
+SERIES_COLUMNS = {
+    'priceData': {'timestamp': np.int64, 'price': np.float64, 'regime': CATEGORY},
+    'vpinData': {'timestamp': np.int64, 'vpin': np.float64},
+}
+
+# Columns of tradeData needed for the volume totals
+TRADE_COLUMNS = {'volume': np.float64, 'isBuy': np.bool_, 'isInformed': np.bool_}
+
+def factorize(values, count):
+    """Encode values as int32 codes in order of first appearance; returns (codes, labels)."""
+    index = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int32, count=count)
+    return codes, tuple(index)
+
+def to_columns(records, columns):
+    """Transpose a list of record dicts into a dict of NumPy columns.
+
+    CATEGORY columns become int32 codes under their own key plus a tuple of
+    labels under '<key>Labels'.
+    """
+    n = len(records)
+    result = {}
+    for key, dtype in columns.items():
+        values = (r[key] for r in records)
+        if dtype == CATEGORY:
+            result[key], result[key + 'Labels'] = factorize(values, n)
+        else:
+            result[key] = np.fromiter(values, dtype=dtype, count=n)
+    return result
+
+def trade_volumes(trades):
+    """Total volume by trader type and direction for a list of trade records."""
+    columns = to_columns(trades, TRADE_COLUMNS)
+    volumes = columns['volume']
+    total = volumes.sum()
+    informed = volumes[columns['isInformed']].sum()
+    buy = volumes[columns['isBuy']].sum()
+    return {'informed': informed, 'retail': total - informed, 'buy': buy, 'sell': total - buy}
+
+def fold_trade_volumes(trades):
+    """Same totals as trade_volumes, folded one record at a time from an iterator."""
+    total = informed = buy = 0.0
+    for t in trades:
+        volume = t['volume']
+        total += volume
+        if t['isInformed']:
+            informed += volume
+        if t['isBuy']:
+            buy += volume
+    return {'informed': informed, 'retail': total - informed, 'buy': buy, 'sell': total - buy}
+
+def stream_json(f, data, stream_key):
+    """Parse a top-level JSON object from f with ijson, yielding stream_key's items.
+
+    Every other top-level value is built in full and stored in data; the records
+    of the stream_key array are yielded one at a time and never kept.
+    """
+    key = item = builder = None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if prefix == '':
+            if builder is not None:
+                data[key] = builder.value
+                builder = None
+            if event == 'map_key':
+                key = value
+                if key != stream_key:
+                    builder = ijson.ObjectBuilder()
+        elif builder is not None:
+            builder.event(event, value)
+        elif prefix == stream_key + '.item':
+            if event == 'start_map':
+                item = ijson.ObjectBuilder()
+            item.event(event, value)
+            if event == 'end_map':
+                yield item.value
+        elif prefix != stream_key:
+            item.event(event, value)
+
+def load_data(filepath='simulation_results/simulation_data.json', stream_trades=False):
+    """Load simulation results from JSON file.
+
+    The per-record series listed in SERIES_COLUMNS are returned as dicts of
+    NumPy columns rather than lists of dicts. Trades are only needed as totals,
+    so tradeData is replaced by its trade_volumes() under 'tradeVolumes'.
+    The file is parsed with orjson (if installed) or json. With stream_trades
+    (requires ijson) it is parsed incrementally instead, so the trades are never
+    held in memory; this is slower and only worth it for very large runs.
+    """
+    if stream_trades:
+        data = {}
+        with open(filepath, 'rb') as f:
+            data['tradeVolumes'] = fold_trade_volumes(stream_json(f, data, 'tradeData'))
+    else:
+        if orjson is not None:
+            with open(filepath, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(filepath, 'r') as f:
+                data = json.load(f)
+        data['tradeVolumes'] = trade_volumes(data.pop('tradeData'))
+    for series, columns in SERIES_COLUMNS.items():
+        data[series] = to_columns(data[series], columns)
+    return data
+
+# Picklable handle to a NumPy column stored in a SharedMemory block
+SharedColumn = namedtuple('SharedColumn', ['name', 'shape', 'dtype'])
+
+def share_series(data):
+    """Move the numeric series columns of data into shared memory.
+
+    Returns (shared_data, blocks): a copy of data whose numeric columns are
+    SharedColumn handles, and the SharedMemory blocks the caller must close and
+    unlink once every worker is done. Category labels and any object columns
+    stay inline.
+    """
+    shared_data = dict(data)
+    blocks = []
+    for series in SERIES_COLUMNS:
+        columns = {}
+        for key, column in data[series].items():
+            if not isinstance(column, np.ndarray) or column.dtype == object:
+                columns[key] = column
+                continue
+            block = shared_memory.SharedMemory(create=True, size=max(column.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(column.shape, column.dtype, buffer=block.buf)[...] = column
+            columns[key] = SharedColumn(block.name, column.shape, column.dtype.str)
+        shared_data[series] = columns
+    return shared_data, blocks
+
+def attach_series(shared_data):
+    """Inverse of share_series: map SharedColumn handles to read-only arrays.
+
+    Returns (data, blocks); the arrays are only valid until blocks are closed.
+    """
+    data = dict(shared_data)
+    blocks = []
+    for series in SERIES_COLUMNS:
+        columns = {}
+        for key, column in shared_data[series].items():
+            if isinstance(column, SharedColumn):
+                block = shared_memory.SharedMemory(name=column.name)
+                blocks.append(block)
+                column = np.ndarray(column.shape, np.dtype(column.dtype), buffer=block.buf)
+                column.flags.writeable = False
+            columns[key] = column
+        data[series] = columns
+    return data, blocks
+
+def render_shared(create, shared_data, output_dir):
+    """Worker entry point: attach to the shared series and draw one chart."""
+    data, blocks = attach_series(shared_data)
+    try:
+        create(data, output_dir)
+    finally:
+        del data
+        for block in blocks:
+            block.close()
 
-def load_data(filepath='simulation_results/simulation_data.json'):
-    """Load simulation results from JSON file."""
-    with open(filepath, 'r') as f:
-        return json.load(f)
+# Series longer than this are downsampled before plotting
+DOWNSAMPLE_THRESHOLD = 4000
+DOWNSAMPLE_POINTS = 2000
 
-def timestamp_to_datetime(ts):
-    """Convert timestamp to datetime object."""
-    return datetime.fromtimestamp(ts / 1000)
+def _lttb_kernel(x, y, n_out):
+    n = len(x)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + np.argmax(area)
+        indices[i + 1] = a
+    return indices
+
+# _lttb_kernel, JIT-compiled on first use if numba is installed
+_lttb_compiled = None
+
+def _compiled_lttb_kernel():
+    """Return the LTTB kernel, importing numba only when a series needs it."""
+    global _lttb_compiled
+    if _lttb_compiled is None:
+        try:
+            from numba import njit
+        except ImportError:  # optional: JIT-compiles the downsampling kernel
+            _lttb_compiled = _lttb_kernel
+        else:
+            _lttb_compiled = njit(cache=True)(_lttb_kernel)
+    return _lttb_compiled
+
+def lttb(x, y, n_out=DOWNSAMPLE_POINTS):
+    """Return indices of n_out points chosen by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points; each bucket in between contributes the
+    point forming the largest triangle with the previously selected point and
+    the next bucket's average, so peaks and troughs survive downsampling.
+    The inner loop is compiled with Numba when it is installed; numba is only
+    imported the first time a series actually needs downsampling.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    kernel = _compiled_lttb_kernel()
+    return kernel(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), n_out)
+
+def plot_indices(timestamps, values):
+    """Indices of the samples to draw for a line plot (all of them unless the series is long)."""
+    if len(values) > DOWNSAMPLE_THRESHOLD:
+        return lttb(timestamps.astype(np.int64), values)
+    return slice(None)
 
 def create_price_chart(data, output_dir):
     """Create price chart with regime coloring."""
-    fig, ax = plt.subplots(figsize=(14, 6))
+    fig = prepare_figure((14, 6))
+    ax = fig.subplots()
     
     price_data = data['priceData']
-    timestamps = [timestamp_to_datetime(p['timestamp']) for p in price_data]
-    prices = [p['price'] for p in price_data]
-    regimes = [p['regime'] for p in price_data]
+    timestamps = price_data['timestamp'].view('datetime64[ms]')
+    prices = price_data['price']
+    regimes = price_data['regime']
+    regime_labels = price_data['regimeLabels']
     
     # Color mapping for regimes
     regime_colors = {
@@ -47,19 +305,23 @@ def create_price_chart(data, output_dir):
     }
     
     # Plot price line
-    ax.plot(timestamps, prices, 'b-', linewidth=1.5, alpha=0.8, label='AAPL Price')
-    
-    # Color background by regime
-    prev_regime = None
-    start_idx = 0
-    for i, regime in enumerate(regimes):
-        if regime != prev_regime:
-            if prev_regime is not None:
-                color = regime_colors.get(prev_regime, '#cccccc')
-                ax.axvspan(timestamps[start_idx], timestamps[i-1], 
-                           alpha=0.15, color=color, label=prev_regime if i == len(regimes)-1 else None)
-            start_idx = i
-            prev_regime = regime
+    keep = plot_indices(timestamps, prices)
+    ax.plot(timestamps[keep], prices[keep], 'b-', linewidth=1.5, alpha=0.8, label='AAPL Price',
+            rasterized=True)
+    
+    # Color background by regime (one collection per color instead of one patch per span).
+    # Each run that is followed by a transition is shaded up to its last sample.
+    x = mdates.date2num(timestamps)
+    code_colors = [regime_colors.get(label, '#cccccc') for label in regime_labels]
+    ends = np.flatnonzero(regimes[1:] != regimes[:-1])
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    spans_by_color = {}
+    for code, x0, x1 in zip(regimes[starts], x[starts], x[ends]):
+        color = code_colors[code]
+        spans_by_color.setdefault(color, []).append((x0, x1 - x0))
+    for color, spans in spans_by_color.items():
+        ax.broken_barh(spans, (0, 1), transform=ax.get_xaxis_transform(),
+                       facecolors=color, edgecolors=color, alpha=0.15)
     
     # Add initial price reference line
     initial_price = prices[0]
@@ -69,9 +331,9 @@ def create_price_chart(data, output_dir):
     ax.set_title('AAPL Tokenized Stock Price Over Trading Week', fontsize=14, fontweight='bold')
     ax.set_xlabel('Date/Time (ET)')
     ax.set_ylabel('Price ($)')
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%a %H:%M'))
-    ax.xaxis.set_major_locator(mdates.HourLocator(interval=8))
-    plt.xticks(rotation=45)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%a %H:%M', tz=MARKET_TZ))
+    ax.xaxis.set_major_locator(mdates.HourLocator(interval=8, tz=MARKET_TZ))
+    ax.tick_params(axis='x', labelrotation=45)
     
     # Add regime legend
     from matplotlib.patches import Patch
@@ -84,52 +346,69 @@ def create_price_chart(data, output_dir):
     ]
     ax.legend(handles=legend_elements, loc='upper left', fontsize=9)
     
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'price_chart.png'), dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'price_chart.png'), dpi=SAVE_DPI)
     print('✅ Created: price_chart.png')
 
 def create_vpin_chart(data, output_dir):
     """Create VPIN time series chart showing order flow toxicity."""
-    fig, ax = plt.subplots(figsize=(14, 5))
+    fig = prepare_figure((14, 5))
+    ax = fig.subplots()
     
     vpin_data = data['vpinData']
-    timestamps = [timestamp_to_datetime(p['timestamp']) for p in vpin_data]
-    vpins = [p['vpin'] for p in vpin_data]
+    timestamps = vpin_data['timestamp'].view('datetime64[ms]')
+    vpins = vpin_data['vpin']
     
     # Plot VPIN
-    ax.plot(timestamps, vpins, 'b-', linewidth=0.8, alpha=0.7)
-    ax.fill_between(timestamps, vpins, alpha=0.3)
+    keep = plot_indices(timestamps, vpins)
+    ax.plot(timestamps[keep], vpins[keep], 'b-', linewidth=0.8, alpha=0.7, rasterized=True)
+    ax.fill_between(timestamps[keep], vpins[keep], alpha=0.3, rasterized=True)
     
     # Add threshold lines
     ax.axhline(y=0.3, color='orange', linestyle='--', alpha=0.7, label='Elevated (30%)')
     ax.axhline(y=0.5, color='red', linestyle='--', alpha=0.7, label='High Risk (50%)')
     ax.axhline(y=0.7, color='darkred', linestyle='--', alpha=0.7, label='Extreme (70%)')
     
-    # Highlight high VPIN periods
-    high_vpin_mask = np.array(vpins) > 0.5
-    for i in range(len(timestamps)):
-        if vpins[i] > 0.5:
-            ax.axvspan(timestamps[max(0, i-1)], timestamps[min(len(timestamps)-1, i+1)], 
-                      alpha=0.2, color='red')
+    # Highlight high VPIN periods (widened by one sample each side, drawn as one collection)
+    high_vpin_mask = vpins > 0.5
+    span_mask = high_vpin_mask.copy()
+    span_mask[1:] |= high_vpin_mask[:-1]
+    span_mask[:-1] |= high_vpin_mask[1:]
+    ax.fill_between(timestamps, 0, 1, where=span_mask, alpha=0.2, color='red',
+                    linewidth=0, transform=ax.get_xaxis_transform())
     
     ax.set_title('VPIN (Order Flow Toxicity) Over Trading Week', fontsize=14, fontweight='bold')
     ax.set_xlabel('Date/Time (ET)')
     ax.set_ylabel('VPIN Score')
     ax.set_ylim(0, 1)
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%a %H:%M'))
-    ax.xaxis.set_major_locator(mdates.HourLocator(interval=8))
-    plt.xticks(rotation=45)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%a %H:%M', tz=MARKET_TZ))
+    ax.xaxis.set_major_locator(mdates.HourLocator(interval=8, tz=MARKET_TZ))
+    ax.tick_params(axis='x', labelrotation=45)
     ax.legend(loc='upper right')
     
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'vpin_chart.png'), dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'vpin_chart.png'), dpi=SAVE_DPI)
     print('✅ Created: vpin_chart.png')
 
+def add_bar_labels(ax, xs, values, offset_up, offset_down, colors=None, **text_kwargs):
+    """Label bar ends at (xs, values) with dollar amounts.
+
+    Labels sit offset_up points above non-negative bars and offset_down points
+    below negative ones (the offsets are applied by two shared transforms).
+    """
+    dpi_trans = ax.figure.dpi_scale_trans
+    up = ax.transData + ScaledTranslation(0, offset_up / 72, dpi_trans)
+    down = ax.transData + ScaledTranslation(0, offset_down / 72, dpi_trans)
+    labels = [f'${value:,.0f}' for value in values]
+    for i, (x, value, label) in enumerate(zip(xs, values, labels)):
+        if colors is not None:
+            text_kwargs['color'] = colors[i]
+        ax.text(x, value, label, ha='center',
+                va='bottom' if value >= 0 else 'top',
+                transform=up if value >= 0 else down, **text_kwargs)
+
 def create_comparison_chart(data, output_dir):
     """Create side-by-side comparison of LP outcomes."""
-    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    fig = prepare_figure((14, 6))
+    axes = fig.subplots(1, 2)
     
     without = data['withoutProtection']
     with_prot = data['withProtection']
@@ -156,8 +435,8 @@ def create_comparison_chart(data, output_dir):
     x = np.arange(len(categories))
     width = 0.35
     
-    bars1 = ax1.bar(x - width/2, without_vals, width, label='Without Protection', color='#e74c3c', alpha=0.8)
-    bars2 = ax1.bar(x + width/2, with_vals, width, label='With StockShield', color='#27ae60', alpha=0.8)
+    ax1.bar(x - width/2, without_vals, width, label='Without Protection', color='#e74c3c', alpha=0.8)
+    ax1.bar(x + width/2, with_vals, width, label='With StockShield', color='#27ae60', alpha=0.8)
     
     ax1.set_ylabel('Amount ($)')
     ax1.set_title('LP P&L Component Breakdown', fontsize=13, fontweight='bold')
@@ -167,22 +446,8 @@ def create_comparison_chart(data, output_dir):
     ax1.axhline(y=0, color='black', linewidth=0.5)
     
     # Add value labels
-    for bar in bars1:
-        height = bar.get_height()
-        ax1.annotate(f'${height:,.0f}',
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3 if height >= 0 else -10),
-                    textcoords="offset points",
-                    ha='center', va='bottom' if height >= 0 else 'top',
-                    fontsize=8)
-    for bar in bars2:
-        height = bar.get_height()
-        ax1.annotate(f'${height:,.0f}',
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3 if height >= 0 else -10),
-                    textcoords="offset points",
-                    ha='center', va='bottom' if height >= 0 else 'top',
-                    fontsize=8)
+    add_bar_labels(ax1, np.concatenate([x - width/2, x + width/2]), without_vals + with_vals,
+                   3, -10, fontsize=8)
     
     # Right chart: Net P&L comparison
     ax2 = axes[1]
@@ -191,22 +456,16 @@ def create_comparison_chart(data, output_dir):
     values = [without['netPnL'], with_prot['netPnL']]
     colors = ['#e74c3c' if v < 0 else '#27ae60' for v in values]
     
-    bars = ax2.bar(labels, values, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
+    ax2.bar(labels, values, color=colors, alpha=0.8, edgecolor='black', linewidth=1.5)
     
     ax2.set_ylabel('Net P&L ($)')
     ax2.set_title('Total LP Performance Comparison', fontsize=13, fontweight='bold')
     ax2.axhline(y=0, color='black', linewidth=0.5)
     
     # Add value labels
-    for bar, val in zip(bars, values):
-        height = bar.get_height()
-        color = 'red' if val < 0 else 'green'
-        ax2.annotate(f'${val:,.0f}',
-                    xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 5 if height >= 0 else -15),
-                    textcoords="offset points",
-                    ha='center', va='bottom' if height >= 0 else 'top',
-                    fontsize=14, fontweight='bold', color=color)
+    add_bar_labels(ax2, range(len(values)), values, 5, -15,
+                   colors=['red' if v < 0 else 'green' for v in values],
+                   fontsize=14, fontweight='bold')
     
     # Add improvement annotation
     improvement = with_prot['netPnL'] - without['netPnL']
@@ -216,14 +475,13 @@ def create_comparison_chart(data, output_dir):
                 fontsize=12, ha='center',
                 bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
     
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'comparison_chart.png'), dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'comparison_chart.png'), dpi=SAVE_DPI)
     print('✅ Created: comparison_chart.png')
 
 def create_protection_value_pie(data, output_dir):
     """Create pie chart showing sources of protection value."""
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig = prepare_figure((10, 8))
+    ax = fig.subplots()
     
     comp = data['comparison']
     
@@ -249,52 +507,75 @@ def create_protection_value_pie(data, output_dir):
     ax.set_title(f'Sources of StockShield Protection Value\n(Total: ${total:,.0f})', 
                  fontsize=14, fontweight='bold')
     
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'protection_value_pie.png'), dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'protection_value_pie.png'), dpi=SAVE_DPI)
     print('✅ Created: protection_value_pie.png')
 
 def create_trade_distribution_chart(data, output_dir):
     """Create charts showing trade distribution by type and regime."""
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig = prepare_figure((14, 5))
+    axes = fig.subplots(1, 2)
     
-    trades = data['tradeData']
+    volumes = data['tradeVolumes']
     
     # Left: Informed vs Retail trading volume
     ax1 = axes[0]
-    informed_vol = sum(t['volume'] for t in trades if t['isInformed'])
-    retail_vol = sum(t['volume'] for t in trades if not t['isInformed'])
+    informed_vol = volumes['informed']
+    retail_vol = volumes['retail']
     
     labels = ['Informed Traders', 'Retail Traders']
     sizes = [informed_vol, retail_vol]
     colors = ['#e74c3c', '#3498db']
+    total = sum(sizes)
     
     wedges, texts, autotexts = ax1.pie(sizes, labels=labels, colors=colors,
-                                        autopct=lambda p: f'${p*sum(sizes)/100/1e6:.1f}M\n({p:.1f}%)',
+                                        autopct=lambda p: f'${p*total/100/1e6:.1f}M\n({p:.1f}%)',
                                         shadow=True, startangle=90)
     ax1.set_title('Trading Volume by Trader Type', fontsize=12, fontweight='bold')
     
     # Right: Buy vs Sell
     ax2 = axes[1]
-    buy_vol = sum(t['volume'] for t in trades if t['isBuy'])
-    sell_vol = sum(t['volume'] for t in trades if not t['isBuy'])
+    buy_vol = volumes['buy']
+    sell_vol = volumes['sell']
     
     labels = ['Buy Orders', 'Sell Orders']
     sizes = [buy_vol, sell_vol]
     colors = ['#27ae60', '#e74c3c']
+    total = sum(sizes)
     
     wedges, texts, autotexts = ax2.pie(sizes, labels=labels, colors=colors,
-                                        autopct=lambda p: f'${p*sum(sizes)/100/1e6:.1f}M\n({p:.1f}%)',
+                                        autopct=lambda p: f'${p*total/100/1e6:.1f}M\n({p:.1f}%)',
                                         shadow=True, startangle=90)
     ax2.set_title('Trading Volume by Direction', fontsize=12, fontweight='bold')
     
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'trade_distribution.png'), dpi=150, bbox_inches='tight')
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'trade_distribution.png'), dpi=SAVE_DPI)
     print('✅ Created: trade_distribution.png')
 
+# Output file for each chart, in generation order
+CHARTS = [
+    ('price_chart.png', create_price_chart),
+    ('vpin_chart.png', create_vpin_chart),
+    ('comparison_chart.png', create_comparison_chart),
+    ('protection_value_pie.png', create_protection_value_pie),
+    ('trade_distribution.png', create_trade_distribution_chart),
+]
+
+def is_up_to_date(output_path, source_mtime):
+    """Return True if output_path exists and is newer than the sources."""
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= source_mtime
+
 def main():
     """Generate all charts."""
+    parser = argparse.ArgumentParser(description='Generate StockShield simulation charts.')
+    parser.add_argument('--force', action='store_true',
+                        help='regenerate charts even if they are newer than the data')
+    parser.add_argument('--stream-trades', action='store_true',
+                        help='stream tradeData with ijson to reduce memory on very large runs')
+    args = parser.parse_args()
+    
+    if args.stream_trades and ijson is None:
+        print('❌ --stream-trades requires ijson: pip install ijson')
+        return
+    
     print('📊 StockShield Simulation Graph Generator\n')
     print('═' * 50)
     
@@ -307,22 +588,43 @@ def main():
         print('   Run the simulation first: npx ts-node src/yellow/e2e-simulation.ts')
         return
     
-    # Load data
-    print(f'\n📂 Loading: {data_path}')
-    data = load_data(data_path)
-    print(f'   Config: {data["config"]["simulationDays"]} days, ${data["config"]["initialLPBalance"]:,} initial')
-    
     # Create output directory
     output_dir = os.path.join(script_dir, 'simulation_results', 'graphs')
     os.makedirs(output_dir, exist_ok=True)
     
-    # Generate charts
+    # Charts are stale if the data or this script changed since they were written
+    source_mtime = max(os.path.getmtime(data_path), os.path.getmtime(os.path.abspath(__file__)))
+    stale = {filename for filename, _ in CHARTS
+             if args.force or not is_up_to_date(os.path.join(output_dir, filename), source_mtime)}
+    
+    if not stale:
+        print(f'\n✅ All charts up to date in: {output_dir}')
+        print('   Use --force to regenerate.')
+        print('═' * 50 + '\n')
+        return
+    
+    # Load data
+    print(f'\n📂 Loading: {data_path}')
+    data = load_data(data_path, stream_trades=args.stream_trades)
+    print(f'   Config: {data["config"]["simulationDays"]} days, ${data["config"]["initialLPBalance"]:,} initial')
+    
+    # Generate charts (independent, so each runs in its own process reading
+    # the series from one shared copy)
     print('\n📈 Generating charts...')
-    create_price_chart(data, output_dir)
-    create_vpin_chart(data, output_dir)
-    create_comparison_chart(data, output_dir)
-    create_protection_value_pie(data, output_dir)
-    create_trade_distribution_chart(data, output_dir)
+    for filename, _ in CHARTS:
+        if filename not in stale:
+            print(f'⏭️  Up to date: {filename}')
+    shared_data, blocks = share_series(data)
+    try:
+        with ProcessPoolExecutor(max_workers=min(len(stale), os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(render_shared, create, shared_data, output_dir)
+                       for filename, create in CHARTS if filename in stale]
+            for future in futures:
+                future.result()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
     
     print('\n' + '═' * 50)
     print(f'✅ All charts saved to: {output_dir}')